@@ -20,8 +20,10 @@ def main():
             print("Goodbye")
             break
 
-        response = bot.chat(user_input)
-        print(f"Mikoshi: {response}\n")
+        print("Mikoshi: ", end="", flush=True)
+        for chunk in bot.stream_chat(user_input):
+            print(chunk, end="", flush=True)
+        print("\n")
 
 
 if __name__ == "__main__":
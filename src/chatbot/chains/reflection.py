@@ -1,12 +1,17 @@
 from pydantic import BaseModel
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
 
 from src.models.reflection import ReflectionModel
 from src.utils import initialize_llm
 
 
 llm = initialize_llm()
-structured_reflection = llm.with_structured_output(ReflectionModel)
+if isinstance(llm, ChatOpenAI):
+    # Native schema enforcement, no tool definition added to every reflection prompt
+    structured_reflection = llm.with_structured_output(ReflectionModel, method="json_schema", strict=True)
+else:
+    structured_reflection = llm.with_structured_output(ReflectionModel)
 
 # System prompt specialized for scientific contexts
 system = """You are a scientific reviewer evaluating chatbot answers.
@@ -1,15 +1,145 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+import tiktoken
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, trim_messages
 from .memory import ChatState
-from src.utils import initialize_llm
+from .memory_semantic import SemanticRecallMemory
+from src.utils import PROJECT_ROOT, initialize_llm, load_config
+
+logger = logging.getLogger(__name__)
 
 llm = initialize_llm()
 
-def chatbot_node(state: ChatState):
-    response = llm.invoke(state["messages"])
-    state["messages"].append(response)
-    return state
+chat_cfg = load_config().get("chat", {})
+
+# Token budget for the history sent to the LLM each turn
+HISTORY_BUDGET_TOKENS = chat_cfg.get("history_budget_tokens", 3000)
+
+# Optional semantic recall of older turns
+recall_cfg = chat_cfg.get("semantic_recall", {})
+# Relative cache dirs are resolved against the project root, like CONFIG_PATH
+recall_cache_dir = recall_cfg.get("cache_dir")
+semantic_memory = (
+    SemanticRecallMemory(
+        model_name=recall_cfg.get("embedding_model", "text-embedding-3-small"),
+        cache_dir=str(PROJECT_ROOT / recall_cache_dir) if recall_cache_dir else None,
+        max_cache_size=recall_cfg.get("max_cache_size", 4096),
+        max_disk_cache_size=recall_cfg.get("max_disk_cache_size", 65536),
+        max_batch_size=recall_cfg.get("max_batch_size", 10),
+        max_batch_hold_s=recall_cfg.get("max_batch_hold_s", 0.01),
+    )
+    if recall_cfg.get("enabled", False)
+    else None
+)
+
+
+# Tokenizer used to measure history size, loaded in the background (see `_encoder`)
+_encoding: Optional[tiktoken.Encoding] = None
+_encoding_loading = threading.Lock()
+# Earliest time (time.monotonic) to try loading again after a failure
+_encoding_retry_at = 0.0
+ENCODING_RETRY_S = 60.0
+
+
+def _load_encoding() -> None:
+    global _encoding, _encoding_retry_at
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(getattr(llm, "model_name", None) or "")
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Usually the download of the BPE file (no network, corrupt file); try again later
+        _encoding_retry_at = time.monotonic() + ENCODING_RETRY_S
+    else:
+        _encoding = encoding
+    finally:
+        _encoding_loading.release()
+
+
+def _encoder() -> Optional[tiktoken.Encoding]:
+    """
+    Tokenizer used to measure history size. Non-OpenAI models fall back to a
+    generic encoding, which is close enough for budgeting.
+    Never blocks: tiktoken downloads the encoding on first use, without a timeout, so it
+    is loaded on a background thread and None is returned (token counts are then
+    estimated) until it is ready. A failed download is retried after ENCODING_RETRY_S.
+    """
+    if (
+        _encoding is None
+        and time.monotonic() >= _encoding_retry_at
+        and _encoding_loading.acquire(blocking=False)
+    ):
+        threading.Thread(target=_load_encoding, name="tiktoken-load", daemon=True).start()
+    return _encoding
+
+
+# Start loading at import, so the encoding is usually ready by the first turn
+_encoder()
+
+
+@lru_cache(maxsize=4096)
+def _encoded_tokens(encoding: tiktoken.Encoding, content: str) -> int:
+    return len(encoding.encode(content))
+
+
+def _content_tokens(content: str) -> int:
+    encoding = _encoder()
+    if encoding is None:
+        return len(content) // 4  # ~4 characters per token
+    return _encoded_tokens(encoding, content)
+
+
+def _count_tokens(messages: List[BaseMessage]) -> int:
+    # trim_messages calls this on growing slices of the history, so each message
+    # is encoded once and looked up afterwards; ~4 tokens of per-message framing on top
+    return sum(_content_tokens(str(m.content)) + 4 for m in messages)
+
+
+def _window(messages: List[BaseMessage], max_tokens: int = HISTORY_BUDGET_TOKENS) -> List[BaseMessage]:
+    """
+    Keep the system message plus the most recent turns that fit in `max_tokens`.
+    """
+    trimmed = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=_count_tokens,
+        strategy="last",
+        include_system=True,
+        start_on="human",
+    )
+    if not messages or (trimmed and trimmed[-1] == messages[-1]):
+        return trimmed
+
+    # The latest message alone is over budget; it still has to be answered
+    system = messages[:1] if len(messages) > 1 and isinstance(messages[0], SystemMessage) else []
+    return system + messages[-1:]
+
+
+async def chatbot_node(state: ChatState):
+    messages = state["messages"]
+    if semantic_memory is not None:
+        # Recall only shrinks the prompt; if embedding fails, send the plain history
+        # (still trimmed by `_window`) rather than failing the turn
+        try:
+            messages = await semantic_memory.build_context(
+                messages,
+                recent_turns=recall_cfg.get("recent_turns", 3),
+                k=recall_cfg.get("k", 5),
+                threshold=recall_cfg.get("threshold", 0.7),
+            )
+        except Exception:
+            logger.warning("Semantic recall failed, sending the plain history", exc_info=True)
+            messages = state["messages"]
+
+    response = await llm.ainvoke(_window(messages))
+    return {"messages": [response]}
 
 
 graph = StateGraph(ChatState)
@@ -1,6 +1,10 @@
-from typing import TypedDict, List, Dict
+from typing import Annotated, TypedDict, List, Dict, NotRequired
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 
 
 class ChatState(TypedDict):
-    messages: List[BaseMessage]  # List of LangChain messages (HumanMessage, AIMessage, etc.)
\ No newline at end of file
+    # List of LangChain messages (HumanMessage, AIMessage, etc.); nodes return only new messages
+    messages: Annotated[List[BaseMessage], add_messages]
+    current_question: NotRequired[str]  # The human message being answered this turn
+    retry_count: NotRequired[int]  # Reflection-triggered retries so far in this conversation
\ No newline at end of file
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import openai
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_openai import OpenAIEmbeddings
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text embedding requests into batched model calls.
+
+    The first request opens a batch; it is sent once `max_batch_size` texts are queued
+    or `max_batch_hold_s` has passed, whichever comes first.
+
+    Args:
+        embedder (Embeddings): The embedding model.
+        max_batch_size (int): Maximum number of texts per model call.
+        max_batch_hold_s (float): Maximum time to wait for a batch to fill, in seconds.
+    """
+
+    def __init__(
+        self, embedder: Embeddings, max_batch_size: int = 10, max_batch_hold_s: float = 0.01
+    ) -> None:
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_batch_hold_s = max_batch_hold_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()  # strong refs so in-flight batches are not GC'd
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text as part of the next batch.
+        """
+        loop = asyncio.get_running_loop()
+        # The queue and worker belong to one event loop; start fresh on a new one
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_batch_hold_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Send without blocking collection of the next batch
+            task = loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            embs = await self.embedder.aembed_documents([text for text, _ in batch])
+        except Exception as e:
+            if isinstance(e, openai.BadRequestError) and len(batch) > 1:
+                # One bad text must not fail the other callers' queries: retry each on its own
+                await asyncio.gather(*(self._flush([item]) for item in batch))
+                return
+            # Rate limits, timeouts, auth: retrying per text would only add load
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), emb in zip(batch, embs):
+            if not future.done():
+                future.set_result(emb)
+
+
+class SemanticRecallMemory:
+    """
+    Select the prior messages relevant to the current question, so long conversations
+    can be answered from the recent turns plus a few recalled ones instead of the full history.
+
+    Embeddings are cached by content hash (in memory, and on disk if `cache_dir` is set),
+    so each message is embedded once no matter how many turns it is considered for.
+    Both caches are LRUs, bounded by `max_cache_size` and `max_disk_cache_size`, since one
+    instance is shared by every conversation.
+
+    Args:
+        embedder (Embeddings): The embedding model. Defaults to `OpenAIEmbeddings(model=model_name)`.
+        model_name (str): The embedding model name, also part of the cache key.
+        cache_dir (Optional[str]): Directory for the on-disk embedding cache. Disabled if None.
+        max_batch_size (int): Maximum number of queries per batched embedding call.
+        max_batch_hold_s (float): Maximum time a query waits for its batch to fill, in seconds.
+        max_cache_size (int): Maximum number of embeddings kept in memory.
+        max_disk_cache_size (int): Maximum number of embeddings kept in `cache_dir`.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embeddings] = None,
+        model_name: str = "text-embedding-3-small",
+        cache_dir: Optional[str] = None,
+        max_batch_size: int = 10,
+        max_batch_hold_s: float = 0.01,
+        max_cache_size: int = 4096,
+        max_disk_cache_size: int = 65536,
+    ) -> None:
+        self.embedder = embedder or OpenAIEmbeddings(model=model_name)
+        self.batcher = EmbeddingBatcher(self.embedder, max_batch_size, max_batch_hold_s)
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_cache_size = max_cache_size
+        self.max_disk_cache_size = max_disk_cache_size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        # Keys of the files in `cache_dir`, least recently used first; read on first use
+        self._disk_keys: Optional[OrderedDict[str, None]] = None
+        self._disk_scan: Optional[asyncio.Task] = None
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._cache[key] = vec
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+
+    # Disk access runs on worker threads (`asyncio.to_thread`), never on the event loop
+
+    def _scan_disk(self) -> OrderedDict[str, None]:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.cache_dir.glob("*.npy"), key=lambda f: f.stat().st_mtime)
+        excess = max(len(files) - self.max_disk_cache_size, 0)
+        for f in files[:excess]:
+            f.unlink(missing_ok=True)
+        return OrderedDict((f.stem, None) for f in files[excess:])
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for key in keys:
+            try:
+                found[key] = np.load(self.cache_dir / f"{key}.npy")
+            except OSError:
+                pass  # removed by another process
+        return found
+
+    def _write_disk(self, vecs: Dict[str, np.ndarray], evicted: List[str]) -> None:
+        for key, vec in vecs.items():
+            np.save(self.cache_dir / f"{key}.npy", vec)
+        for key in evicted:
+            (self.cache_dir / f"{key}.npy").unlink(missing_ok=True)
+
+    async def _disk_index(self) -> OrderedDict[str, None]:
+        if self._disk_keys is None:
+            # Concurrent first callers share one scan
+            if self._disk_scan is None:
+                self._disk_scan = asyncio.create_task(asyncio.to_thread(self._scan_disk))
+            keys = await self._disk_scan
+            if self._disk_keys is None:
+                self._disk_keys = keys
+        return self._disk_keys
+
+    async def _lookup(self, keys: List[str]) -> Dict[str, Optional[np.ndarray]]:
+        found: Dict[str, Optional[np.ndarray]] = {}
+        for key in keys:
+            found[key] = self._cache.get(key)
+            if found[key] is not None:
+                self._cache.move_to_end(key)
+
+        if self.cache_dir is not None:
+            disk_keys = await self._disk_index()
+            on_disk = [k for k, emb in found.items() if emb is None and k in disk_keys]
+            if on_disk:
+                for key, emb in (await asyncio.to_thread(self._read_disk, on_disk)).items():
+                    if key in disk_keys:
+                        disk_keys.move_to_end(key)
+                    self._remember(key, emb)
+                    found[key] = emb
+        return found
+
+    async def _store(self, embs: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+        vecs = {}
+        for key, emb in embs.items():
+            vec = np.asarray(emb, dtype=np.float32)
+            vec /= np.linalg.norm(vec) or 1.0  # unit length, so dot product is cosine similarity
+            self._remember(key, vec)
+            vecs[key] = vec
+
+        if self.cache_dir is not None:
+            disk_keys = await self._disk_index()
+            for key in vecs:
+                disk_keys[key] = None
+                disk_keys.move_to_end(key)
+            evicted = []
+            while len(disk_keys) > self.max_disk_cache_size:
+                evicted.append(disk_keys.popitem(last=False)[0])
+            await asyncio.to_thread(self._write_disk, vecs, evicted)
+        return vecs
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a single query, using the cache when possible. Concurrent queries
+        (e.g. multi-turn `achat` sessions sharing the module-level memory) share
+        embedding calls through `self.batcher`.
+        """
+        key = self._key(text)
+        emb = (await self._lookup([key]))[key]
+        if emb is None:
+            emb = (await self._store({key: await self.batcher.embed(text)}))[key]
+        return emb
+
+    async def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed many texts as an (N, d) matrix, sending only cache misses to the model (in one call).
+        """
+        keys = [self._key(t) for t in texts]
+        found = await self._lookup(list(dict.fromkeys(keys)))
+        missing = {k: t for k, t in zip(keys, texts) if found[k] is None}
+        if missing:
+            embs = await self.embedder.aembed_documents(list(missing.values()))
+            found.update(await self._store(dict(zip(missing, embs))))
+        return np.stack([found[k] for k in keys])
+
+    async def recall(
+        self, query: str, candidates: List[BaseMessage], k: int = 5, threshold: float = 0.7
+    ) -> List[BaseMessage]:
+        """
+        Return up to `k` candidate messages whose similarity to `query` is at least `threshold`.
+
+        Args:
+            query (str): The text to compare against.
+            candidates (List[BaseMessage]): The messages to choose from.
+            k (int): Maximum number of messages to return.
+            threshold (float): Minimum cosine similarity for a message to be recalled.
+
+        Returns:
+            List[BaseMessage]: The recalled messages, in their original order.
+        """
+        return [candidates[i] for i in await self._recall_indices(query, candidates, k, threshold)]
+
+    async def _recall_indices(
+        self, query: str, candidates: List[BaseMessage], k: int, threshold: float
+    ) -> List[int]:
+        if not candidates or k <= 0:
+            return []
+
+        embs = await self.embed_documents([str(m.content) for m in candidates])
+        scores = embs @ await self.embed_query(query)
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[scores[top] >= threshold]
+        return sorted(top.tolist())
+
+    async def build_context(
+        self,
+        messages: List[BaseMessage],
+        recent_turns: int = 3,
+        k: int = 5,
+        threshold: float = 0.7,
+    ) -> List[BaseMessage]:
+        """
+        Reduce a conversation to: leading system message + recalled older turns + the last
+        `recent_turns` turns (a turn starts at a human message). The current turn is always
+        kept, so `recent_turns` below 1 is treated as 1.
+
+        Up to `k` older messages are matched, and each match brings back its whole turn, so a
+        recalled answer keeps its question and the recalled block starts on a human message.
+        """
+        recent_turns = max(recent_turns, 1)
+        system = messages[:1] if messages and isinstance(messages[0], SystemMessage) else []
+        body = messages[len(system):]
+
+        start, turns = len(body), 0
+        while start > 0 and turns < recent_turns:
+            start -= 1
+            if isinstance(body[start], HumanMessage):
+                turns += 1
+
+        older, recent = body[:start], body[start:]
+        if not older:
+            return messages
+
+        # Messages before the first human message belong to no turn and are not recalled
+        turn_starts = [i for i, m in enumerate(older) if isinstance(m, HumanMessage)]
+        if not turn_starts:
+            return system + recent
+
+        query = str(body[-1].content)
+        first = turn_starts[0]
+        hits = await self._recall_indices(query, older[first:], k, threshold)
+
+        bounds = turn_starts + [len(older)]
+        recalled_turns = sorted({bisect_right(turn_starts, first + i) - 1 for i in hits})
+        recalled = [m for t in recalled_turns for m in older[bounds[t]:bounds[t + 1]]]
+        return system + recalled + recent
@@ -3,12 +3,10 @@ from langchain_core.messages import AIMessage
 from src.chatbot.memory import ChatState
 from src.chatbot.chains.generation import generation_chain
 
-def generate_node(state: ChatState):
+async def generate_node(state: ChatState):
     """Generate an AI response from the last human message"""
     question = state["messages"][-1].content
-    response = generation_chain.invoke({"question": question})
+    response = await generation_chain.ainvoke({"question": question})
 
-    response_content = response.content if hasattr(response, 'content') else str(response)
-    state["messages"].append(AIMessage(content=response_content))
-    
-    return state
\ No newline at end of file
+    # generation_chain is prompt | llm, so the response is always a message
+    return {"messages": [AIMessage(content=response.content)], "current_question": question}
\ No newline at end of file
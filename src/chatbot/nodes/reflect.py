@@ -1,22 +1,60 @@
-from langchain_core.messages import HumanMessage
+import re
 from typing import Tuple
 
+from langchain_core.messages import HumanMessage
+
 from src.chatbot.memory import ChatState
 from src.chatbot.chains.reflection import reflection_chain
 
-retry_counts = {}
+# Answers shorter than this, without numbers or scientific topics, skip reflection
+REFLECTION_MIN_LENGTH = 200
+# Matched at the start of a word, so stems also cover derived forms
+# ("cellular", "measurement", "energies") but not "excellent" or "improve"
+SCIENTIFIC_KEYWORDS = (
+    "physic", "chemi", "biolog", "medic", "equation", "formula", "theorem",
+    "experiment", "hypothes", "molecul", "reaction", "energ", "genetic", "genom", "cell",
+    "quantum", "dose", "dosage", "measur", "calculat", "prove", "proof",
+)
+# Matched as whole words (optionally plural), as their stems are too common ("general")
+SCIENTIFIC_WORDS = ("gene",)
+_NUM_RE = re.compile(r"\d")
+_KEYWORD_RE = re.compile(
+    r"\b(?:"
+    + "|".join(map(re.escape, SCIENTIFIC_KEYWORDS))
+    + r"|(?:" + "|".join(map(re.escape, SCIENTIFIC_WORDS)) + r")s?\b)",
+    re.IGNORECASE,
+)
+
 
-def reflect_node(state: ChatState) -> Tuple[ChatState, dict]:
-    """Check if the last AI response is good enough."""
+def needs_reflection(answer: str, question: str) -> bool:
+    """Cheap local check for whether an answer is worth a reflection LLM call."""
+    if len(answer) > REFLECTION_MIN_LENGTH or _NUM_RE.search(answer):
+        return True
+    return _KEYWORD_RE.search(question) is not None
+
+
+async def reflect_node(state: ChatState) -> Tuple[dict, dict]:
+    """Check if the last AI response is good enough. Returns (state update, reflection info)."""
     last_answer = state["messages"][-1].content
-    question = next(m.content for m in state["messages"] if isinstance(m, HumanMessage))
+    question = state.get("current_question")
+    if question is None:
+        # State did not pass through generate_node; use the latest human message
+        question = next(
+            (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), ""
+        )
+
+    if not needs_reflection(last_answer, question):
+        return {}, {"passed": True, "explanation": "skipped", "should_retry": False}
 
-    grade = reflection_chain.invoke({"answer": last_answer, "question": question})
+    grade = await reflection_chain.ainvoke({"answer": last_answer, "question": question})
     
     reflection_info = {
         "passed": grade.score == "yes",
         "explanation": grade.explanation,
         "should_retry": grade.score != "yes"
     }
+    update = {}
+    if reflection_info["should_retry"]:
+        update["retry_count"] = state.get("retry_count", 0) + 1
 
-    return state, reflection_info
\ No newline at end of file
+    return update, reflection_info
\ No newline at end of file
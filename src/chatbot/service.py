@@ -1,6 +1,44 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Coroutine, Iterator, List, Optional
+
 from langchain_core.messages import HumanMessage
+from src.utils import load_config, prewarm_llm
+from .chains.generation import generation_chain
+from .chains.reflection import reflection_chain
 from .graph import app
 from .memory import ChatState
+from .nodes.reflect import needs_reflection
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _service_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop that every ChatbotService in the process runs its LLM calls on.
+    The LLM client and its async connection pool are shared process-wide, and pooled
+    connections are bound to the loop that opened them, so the loop must be shared too.
+    It runs on a daemon thread, so blocking callers from any thread can submit to it.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="chatbot-loop", daemon=True).start()
+    return _loop
+
+
+async def _on_service_loop(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Await a coroutine on the service event loop, from whichever loop the caller runs.
+    """
+    loop = _service_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
 
 
 class ChatbotService:
@@ -13,22 +51,205 @@ class ChatbotService:
         # Start with an empty chat state
         self.state: ChatState = {"messages": []}
 
-    def chat(self, user_input: str) -> str:
+        # Handle on the background warm-up; requests never wait for it, since they
+        # share its loop and the connection pool serialises access to the connection
+        self._warm: Optional[concurrent.futures.Future] = None
+        if load_config()["llm_config"].get("prewarm", False):
+            self._start_prewarm()
+
+    def _start_prewarm(self):
+        """
+        Warm the LLM connection pool in the background.
+        The warm-up runs on the service loop, the same loop every request runs on,
+        so the connection it opens can be reused by the first real request.
+        """
+        self._warm = asyncio.run_coroutine_threadsafe(prewarm_llm(), _service_loop())
+
+    def _run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Run a coroutine to completion on the service event loop, blocking the caller.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, _service_loop())
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. Ctrl-C in the CLI: stop the request instead of leaving it running
+            future.cancel()
+            raise
+
+    async def achat(self, user_input: str) -> str:
         """
         Send a user message to the chatbot and return the bot's reply.
+        Async variant for callers that already run an event loop (e.g. servers).
+        The request itself runs on the shared service loop, see `_service_loop`.
         """
+        return await _on_service_loop(self._achat(user_input))
+
+    async def _achat(self, user_input: str) -> str:
         # Add human input
         self.state["messages"].append(HumanMessage(content=user_input))
 
         # Run through LangGraph app
-        self.state = app.invoke(self.state)
+        self.state = await app.ainvoke(self.state)
 
         # Get last bot message
         bot_reply = self.state["messages"][-1].content
         return bot_reply
-    
+
+    def chat(self, user_input: str) -> str:
+        """
+        Send a user message to the chatbot and return the bot's reply.
+        Blocking wrapper around `achat` for the CLI.
+        """
+        return self._run(self._achat(user_input))
+
+    async def astream_chat(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Send a user message to the chatbot and yield the reply as it is generated.
+        The complete reply is added to the conversation state once the stream ends.
+        """
+        stream = self._astream_chat(user_input)
+
+        async def next_chunk() -> str:
+            return await anext(stream)
+
+        try:
+            while True:
+                try:
+                    yield await _on_service_loop(next_chunk())
+                except StopAsyncIteration:
+                    return
+        finally:
+            await _on_service_loop(stream.aclose())
+
+    async def _astream_chat(self, user_input: str) -> AsyncIterator[str]:
+        self.state["messages"].append(HumanMessage(content=user_input))
+
+        async for mode, data in app.astream(self.state, stream_mode=["messages", "values"]):
+            if mode == "values":
+                self.state = data
+                continue
+
+            chunk, metadata = data
+            if metadata.get("langgraph_node") == "chatbot":
+                text = chunk.text()
+                if text:
+                    yield text
+
+    def stream_chat(self, user_input: str) -> Iterator[str]:
+        """
+        Blocking wrapper around `astream_chat`, yielding reply chunks as they arrive.
+        """
+        stream = self._astream_chat(user_input)
+
+        async def next_chunk() -> str:
+            return await anext(stream)
+
+        try:
+            while True:
+                try:
+                    yield self._run(next_chunk())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(stream.aclose())
+
+    async def abatch_chat(self, inputs: List[str], max_concurrency: int = 10) -> List[str]:
+        """
+        Answer many independent user prompts in one concurrent fan-out.
+
+        Each prompt gets its own fresh state, so the service conversation is left untouched.
+
+        Args:
+            inputs:          The user prompts to answer.
+            max_concurrency: Maximum number of graph runs in flight at once (default 10).
+
+        Returns:
+            The bot replies, in the same order as `inputs`.
+        """
+        return await _on_service_loop(self._abatch_chat(inputs, max_concurrency))
+
+    async def _abatch_chat(self, inputs: List[str], max_concurrency: int) -> List[str]:
+        if not inputs:
+            return []
+
+        states: List[ChatState] = [{"messages": [HumanMessage(content=u)]} for u in inputs]
+        results = await app.abatch(states, config={"max_concurrency": max_concurrency})
+
+        return [r["messages"][-1].content for r in results]
+
+    def batch_chat(self, inputs: List[str], max_concurrency: int = 10) -> List[str]:
+        """
+        Blocking wrapper around `abatch_chat`.
+        """
+        return self._run(self._abatch_chat(inputs, max_concurrency))
+
+    async def apipelined_chat(self, inputs: List[str], max_retries: int = 1) -> List[str]:
+        """
+        Answer many independent user prompts with reflection, overlapping LLM calls.
+
+        While the answer to prompt i is being reflected on, generation of prompt i+1
+        is already in flight. Answers that `needs_reflection` deems low-risk are accepted
+        without a reflection call. A failed grade regenerates the answer (up to `max_retries`
+        times) before moving on.
+
+        Args:
+            inputs:      The user prompts to answer.
+            max_retries: Maximum regenerations per prompt when reflection fails.
+
+        Returns:
+            The bot replies, in the same order as `inputs`.
+        """
+        return await _on_service_loop(self._apipelined_chat(inputs, max_retries))
+
+    async def _apipelined_chat(self, inputs: List[str], max_retries: int) -> List[str]:
+        if not inputs:
+            return []
+
+        def generate(question: str) -> asyncio.Task:
+            return asyncio.create_task(generation_chain.ainvoke({"question": question}))
+
+        def reflect(question: str, answer: str) -> asyncio.Task:
+            return asyncio.create_task(
+                reflection_chain.ainvoke({"answer": answer, "question": question})
+            )
+
+        replies: List[str] = []
+        in_flight: deque[asyncio.Task] = deque([generate(inputs[0])])
+        try:
+            for i, question in enumerate(inputs):
+                response = await in_flight.popleft()
+                reflect_task = None
+                if needs_reflection(response.content, question):
+                    reflect_task = reflect(question, response.content)
+
+                # Start the next generation before waiting on this reflection
+                if i + 1 < len(inputs):
+                    in_flight.append(generate(inputs[i + 1]))
+
+                if reflect_task is not None:
+                    grade = await reflect_task
+                    retries = 0
+                    while grade.score != "yes" and retries < max_retries:
+                        response = await generate(question)
+                        grade = await reflect(question, response.content)
+                        retries += 1
+
+                replies.append(response.content)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        return replies
+
+    def pipelined_chat(self, inputs: List[str], max_retries: int = 1) -> List[str]:
+        """
+        Blocking wrapper around `apipelined_chat`.
+        """
+        return self._run(self._apipelined_chat(inputs, max_retries))
+
     def reset(self):
         """
         Reset the conversation state.
         """
-        self.state = {"messages": []}
\ No newline at end of file
+        self.state = {"messages": []}
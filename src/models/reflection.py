@@ -4,5 +4,5 @@ from typing import Literal
 class ReflectionModel(BaseModel):
     """Structured output for grading chatbot answers in scientific contexts"""
 
-    score: Literal['yes', 'no'] = Field(description="'yes' or 'no' indicating scientific contexts.")
-    explanation: str = Field(description="Brief reasoning for the score")
\ No newline at end of file
+    score: Literal['yes', 'no'] = Field(description="'yes' if scientifically correct and precise")
+    explanation: str = Field(description="One short sentence of feedback")
\ No newline at end of file
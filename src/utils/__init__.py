@@ -1,11 +1,13 @@
-from .llm_utils import initialize_llm, load_config
+from .llm_utils import PROJECT_ROOT, initialize_llm, load_config, prewarm_llm
 from .prompt_utils import clean_prompt
 from .s3_utils import S3Utils
 
 
 __all__ = [
+    "PROJECT_ROOT",
     "load_config",
     "initialize_llm",
+    "prewarm_llm",
     "clean_prompt",
     "S3Utils"
 ]
\ No newline at end of file
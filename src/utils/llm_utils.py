@@ -1,38 +1,76 @@
 import yaml
 import os
+from functools import lru_cache
 from pathlib import Path
+import httpx
+from botocore.config import Config as BotoConfig
 from langchain_openai import ChatOpenAI
 from langchain_aws import ChatBedrockConverse
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "config.yaml"
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml C parser
+except ImportError:
+    from yaml import SafeLoader
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CONFIG_PATH = PROJECT_ROOT / "config" / "config.yaml"
 
+
+@lru_cache(maxsize=1)
 def load_config():
     """
     Load configuration from config.yaml as dict.
+    The result is cached; treat it as read-only.
+    """
+    # Binary mode lets libyaml read the stream directly
+    with open(CONFIG_PATH, "rb") as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def _http_settings(client_cfg: dict) -> dict:
+    """
+    Read the optional `http` section of the client config, filling in defaults.
     """
-    with open(CONFIG_PATH, "r") as f:
-        return yaml.safe_load(f)
+    http_cfg = client_cfg.get("http") or {}
+    return {
+        "max_connections": http_cfg.get("max_connections", 256),
+        "max_keepalive_connections": http_cfg.get("max_keepalive_connections", 128),
+        "keepalive_expiry": http_cfg.get("keepalive_expiry", 30.0),
+        "timeout": http_cfg.get("timeout", 120.0),
+    }
 
 
+@lru_cache(maxsize=1)
 def initialize_llm():
     """
     Initialize an LLM client based on config.yaml.
     Supports: OPENAI, BEDROCK, GEMINI, SLIP.
+    The client is created once per process and shared, so every caller reuses
+    the same connection pool.
     """
     config = load_config()
     client_cfg = config["llm_config"]["client"]
     client_name = client_cfg["name"].upper()
+    http_cfg = _http_settings(client_cfg)
 
     if client_name == "OPENAI":
         model_cfg = client_cfg["openai"]
+        limits = httpx.Limits(
+            max_connections=http_cfg["max_connections"],
+            max_keepalive_connections=http_cfg["max_keepalive_connections"],
+            keepalive_expiry=http_cfg["keepalive_expiry"],
+        )
         return ChatOpenAI(
             model=model_cfg["model_name"],
             temperature=model_cfg["model_params"].get("temperature", 0),
             max_retries=model_cfg["model_params"].get("max_retries", 3),
             max_tokens=model_cfg["model_params"].get("max_output_tokens", 2048),  # type: ignore
             top_p=model_cfg["model_params"].get("top_p", 1.0),
+            # The SDK applies its own per-request timeout over the httpx client's, so set both
+            timeout=http_cfg["timeout"],
+            http_client=httpx.Client(limits=limits, timeout=http_cfg["timeout"]),
+            http_async_client=httpx.AsyncClient(limits=limits, timeout=http_cfg["timeout"]),
         )
     
     elif client_name == "BEDROCK":
@@ -41,6 +79,10 @@ def initialize_llm():
             model=model_cfg["model_name"],
             temperature=model_cfg["model_params"].get("temperature", 0),
             max_tokens=model_cfg["model_params"].get("max_gen_len", 2048),
+            config=BotoConfig(
+                max_pool_connections=http_cfg["max_connections"],
+                read_timeout=http_cfg["timeout"],
+            ),
         )
 
     elif client_name == "GEMINI":
@@ -49,10 +91,28 @@ def initialize_llm():
             model=model_cfg["model_name"],
             temperature=model_cfg["model_params"].get("temperature", 0),
             max_output_tokens=model_cfg["model_params"].get("max_output_tokens", 2048),
+            timeout=http_cfg["timeout"],
         )
         
     elif client_name == "SLIP":
         raise NotImplementedError("SLIP client not implemented yet.")
     
     else:
-        raise ValueError(f"Unsupported LLM client: {client_name}")
\ No newline at end of file
+        raise ValueError(f"Unsupported LLM client: {client_name}")
+
+
+async def prewarm_llm() -> None:
+    """
+    Open a connection to the LLM provider ahead of the first real request, so it
+    does not pay DNS + TCP + TLS setup. Only the OPENAI client exposes the pool it
+    sends requests through; for other clients this is a no-op.
+    Failures are ignored, the real request will simply open its own connection.
+    """
+    llm = initialize_llm()
+    if not isinstance(llm, ChatOpenAI) or llm.http_async_client is None:
+        return
+
+    try:
+        await llm.http_async_client.head(str(llm.root_async_client.base_url))
+    except httpx.HTTPError:
+        pass
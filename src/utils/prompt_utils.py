@@ -7,6 +7,22 @@ This module provides functions to clean and normalize prompts before sending the
 import re
 from typing import Pattern
 
+_WS_RE: Pattern[str] = re.compile(r'\s+')
+
+# Whitespace other than ' ' that `_WS_RE` would rewrite (tabs are replaced beforehand);
+# str patterns' \s also matches the ASCII separators \x1c-\x1f
+_OTHER_ASCII_WS = ('\n', '\r', '\f', '\v', '\x1c', '\x1d', '\x1e', '\x1f')
+
+
+def _has_collapsible_whitespace(text: str) -> bool:
+    """
+    Cheap check for whether collapsing whitespace could change `text`.
+    Already-clean ASCII text (single spaces only) lets us skip the regex.
+    """
+    if not text.isascii():
+        return True  # unicode whitespace is matched by \s as well
+    return '  ' in text or any(c in text for c in _OTHER_ASCII_WS)
+
 
 def clean_prompt(prompt: str, 
                  remove_backslashes: bool = True,
@@ -39,14 +55,14 @@ def clean_prompt(prompt: str,
     # normalize tabs to spaces
     text = text.replace('\t', ' ')
     
-    if collapse_whitespace:
+    if collapse_whitespace and _has_collapsible_whitespace(text):
         if preserve_newlines:
-            # temporarily mark newlines, collapse other whitespace, restore newlines
-            text = text.replace('\n', '<NEWLINE>')
-            text = re.sub(r'\s+', ' ', text)
-            text = text.replace('<NEWLINE>', '\n')
+            # collapse whitespace within each line, then rejoin on newlines;
+            # split on '\n' only, splitlines() would also break on \v, \f, \x1c-\x1e, \x85, ...
+            text = text.replace('\r\n', '\n')  # a lone '\r' is collapsed like other whitespace
+            text = '\n'.join(_WS_RE.sub(' ', line).strip() for line in text.split('\n'))
         else:
             # collapse everything (spaces, newlines, tabs) to single spaces
-            text = re.sub(r'\s+', ' ', text)
+            text = _WS_RE.sub(' ', text)
     
     return text.strip() 
\ No newline at end of file
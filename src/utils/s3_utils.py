@@ -1,12 +1,35 @@
+import asyncio
+import io
 import json
 import os
 import pickle
-from typing import Any, Dict, List, Optional
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 
 import boto3
 from aiobotocore.session import get_session
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Objects above the threshold are transferred as parallel 8 MB parts
+_MULTIPART_SIZE = 8 * 1024 * 1024
+_TRANSFER = TransferConfig(
+    multipart_threshold=_MULTIPART_SIZE,
+    multipart_chunksize=_MULTIPART_SIZE,
+    max_concurrency=10,
+)
+# For transfers already fanned out over the S3Utils thread pool: parts go one at a
+# time, so concurrent requests stay within the client's connection pool
+_POOLED_TRANSFER = TransferConfig(
+    multipart_threshold=_MULTIPART_SIZE,
+    multipart_chunksize=_MULTIPART_SIZE,
+    max_concurrency=1,
+)
+
 
 class S3Utils:
     """
@@ -14,7 +37,7 @@ class S3Utils:
 
     Args:
         bucket_name (str): The name of the S3 bucket.
-        aws_region (str): The AWS region where the S3 bucket is located.
+        pool_size (int): The number of concurrent transfers for multi-file operations.
 
     Attributes:
         s3 (boto3.client): The S3 client object.
@@ -22,15 +45,25 @@ class S3Utils:
 
     """
 
-    def __init__(self, bucket_name: str) -> None:
+    def __init__(self, bucket_name: str, pool_size: int = 16) -> None:
         """
         Initialize the S3Utils class.
 
         Args:
             bucket_name (str): The name of the S3 bucket.
+            pool_size (int): The number of concurrent transfers for multi-file operations.
         """
-        self.s3 = boto3.client("s3")
+        # boto3 clients are thread-safe; size the connection pool for the worker threads
+        self.s3 = boto3.client("s3", config=Config(max_pool_connections=max(pool_size, 10)))
         self.bucket_name = bucket_name
+        self._pool_size = pool_size
+
+        # aiobotocore client shared by the async methods, opened on first use.
+        # The client and its lock belong to the event loop they were created on.
+        self._async_client = None
+        self._async_stack: Optional[AsyncExitStack] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_client_lock: Optional[asyncio.Lock] = None
 
     def list_files_with_ext(
         self, prefix: str, extensions: Optional[List[str]] = None
@@ -74,10 +107,12 @@ class S3Utils:
         Returns:
             dict: A dictionary mapping the downloaded file locations to their corresponding keys.
         """
-        download_loc = {}
-        for key in keys_to_download:
-            location = self.download_object(local_download_path, key)
-            download_loc[key] = str(location)
+        with ThreadPoolExecutor(max_workers=self._pool_size) as pool:
+            locations = pool.map(
+                lambda key: self._download_object(local_download_path, key, _POOLED_TRANSFER),
+                keys_to_download,
+            )
+            download_loc = {key: str(location) for key, location in zip(keys_to_download, locations)}
 
         return download_loc
 
@@ -91,11 +126,18 @@ class S3Utils:
         Returns:
             str: The path to the downloaded object.
         """
+        return self._download_object(local_download_path, file_name, _TRANSFER)
+
+    def _download_object(
+        self, local_download_path: str, file_name: str, transfer_config: TransferConfig
+    ) -> str:
         os.makedirs(local_download_path, exist_ok=True)
 
         local_file_name = file_name.split("/")[-1]
         download_path = os.path.join(local_download_path, local_file_name)
-        self.s3.download_file(self.bucket_name, file_name, str(download_path))
+        self.s3.download_file(
+            self.bucket_name, file_name, str(download_path), Config=transfer_config
+        )
         return download_path
 
     def file_exists_in_s3(self, key: str) -> bool:
@@ -175,7 +217,7 @@ class S3Utils:
 
     def copy_local_dir_to_s3(
         self, src_dir: str, dest_prefix: str, extensions: Optional[List[str]] = None
-    ) -> None:
+    ) -> Dict[str, str]:
         """
         Copy files from a local directory to the S3 bucket.
 
@@ -185,26 +227,22 @@ class S3Utils:
             extensions (Optional[List[str]]): The list of file extensions to filter the files.
 
         Returns:
-            None
-        """
-        tgt_files = [os.path.join(dp, f) for dp, dn, fn in os.walk(src_dir) for f in fn]
-        if extensions is not None and len(extensions) > 0:
-            tgt_files = [
-                f for f in tgt_files if any(f.endswith(ext) for ext in extensions)
-            ]
-        else:
-            tgt_files = [f for f in tgt_files]
-        tgt_files = [f.replace(f"{src_dir}/", "") for f in tgt_files]
-        uploaded_files = {}
-        for tgt_file in tgt_files:
-            self.s3.upload_file(
-                os.path.join(src_dir, tgt_file),
-                self.bucket_name,
-                os.path.join(dest_prefix, tgt_file),
-            )
-            uploaded_files[os.path.join(src_dir, tgt_file)] = (
-                f"s3://{self.bucket_name}/{os.path.join(dest_prefix, tgt_file)}"
-            )
+            Dict[str, str]: A dictionary mapping the local file paths to their S3 URIs.
+        """
+        src = Path(src_dir)
+        tgt_files = [
+            p
+            for p in src.rglob("*")
+            if p.is_file() and (not extensions or any(p.name.endswith(ext) for ext in extensions))
+        ]
+
+        def _upload_one(tgt_file: Path) -> Tuple[str, str]:
+            key = posixpath.join(dest_prefix, tgt_file.relative_to(src).as_posix())
+            self.s3.upload_file(str(tgt_file), self.bucket_name, key, Config=_POOLED_TRANSFER)
+            return str(tgt_file), f"s3://{self.bucket_name}/{key}"
+
+        with ThreadPoolExecutor(max_workers=self._pool_size) as pool:
+            uploaded_files = dict(pool.map(_upload_one, tgt_files))
         return uploaded_files
 
     def copy_s3_dir_to_local(
@@ -224,7 +262,8 @@ class S3Utils:
         src_prefix = src_prefix.strip("/")
         s3_file_keys = self.list_files_with_ext(src_prefix, extensions)
         os.makedirs(dest_dir, exist_ok=True)
-        for s3_file_key in s3_file_keys:
+
+        def _download_one(s3_file_key: str) -> None:
             print(f"Downloading {s3_file_key} to {dest_dir}")
             s3_file_name = s3_file_key.replace(f"{src_prefix}/", "")
             file_name = s3_file_name.split("/")[-1]
@@ -234,8 +273,12 @@ class S3Utils:
                 self.bucket_name,
                 os.path.join(src_prefix, s3_file_name),
                 os.path.join(dest_dir, s3_file_name),
+                Config=_POOLED_TRANSFER,
             )
 
+        with ThreadPoolExecutor(max_workers=self._pool_size) as pool:
+            list(pool.map(_download_one, s3_file_keys))
+
     def copy_s3_to_s3(
         self, src_prefix: str, dest_prefix: str, extensions: Optional[List[str]] = None
     ) -> None:
@@ -269,15 +312,32 @@ class S3Utils:
 
         Returns:
             None
+
+        Raises:
+            ClientError: If any object could not be deleted.
         """
-        try:
-            contents = self.s3.list_objects(Bucket=self.bucket_name, Prefix=prefix)[
-                "Contents"
-            ]
-        except KeyError:
-            contents = []
-        for obj in contents:
-            self.s3.delete_object(Bucket=self.bucket_name, Key=obj["Key"])
+        # Each page holds at most 1000 keys, the DeleteObjects limit per request
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if not keys:
+                continue
+            response = self.s3.delete_objects(
+                Bucket=self.bucket_name, Delete={"Objects": keys, "Quiet": True}
+            )
+            # DeleteObjects succeeds as a whole and reports per-key failures in "Errors"
+            errors = response.get("Errors", [])
+            if errors:
+                failed = ", ".join(f"{e['Key']} ({e['Code']})" for e in errors)
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": errors[0]["Code"],
+                            "Message": f"Failed to delete {len(errors)} object(s): {failed}",
+                        }
+                    },
+                    "DeleteObjects",
+                )
 
     def upload_file_to_s3(self, key: str, local_file_path: str) -> bool:
         """
@@ -295,25 +355,38 @@ class S3Utils:
         """
         try:
             self.s3.upload_file(
-                Bucket=self.bucket_name, Key=key, Filename=local_file_path
+                Bucket=self.bucket_name, Key=key, Filename=local_file_path, Config=_TRANSFER
             )
             return True
         except FileNotFoundError:
             print("The file was not found.")
             return False
 
-    def upload_fileobj_to_s3(self, key: str, fileobj: bytes) -> None:
+    def upload_fileobj_to_s3(self, key: str, fileobj: Union[bytes, BinaryIO]) -> None:
         """
         Upload a file object to the S3 bucket.
 
         Args:
             key (str): The key to use for the S3 object.
-            fileobj (bytes): The file object to upload.
+            fileobj (Union[bytes, BinaryIO]): The file object (or raw bytes) to upload.
 
         Returns:
             None
         """
-        self.s3.put_object(Body=fileobj, Bucket=self.bucket_name, Key=key)
+        if isinstance(fileobj, (bytes, bytearray)):
+            fileobj = io.BytesIO(fileobj)
+        self.s3.upload_fileobj(
+            Fileobj=fileobj, Bucket=self.bucket_name, Key=key, Config=_TRANSFER
+        )
+
+    def _upload_bytes(self, key: str, payload: bytes) -> None:
+        """
+        Upload an in-memory payload, switching to a multipart upload above the threshold.
+        """
+        if len(payload) > _MULTIPART_SIZE:
+            self.upload_fileobj_to_s3(key, payload)
+        else:
+            self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=payload)
 
     def upload_string_to_s3(self, key: str, s: str) -> None:
         """
@@ -339,7 +412,7 @@ class S3Utils:
         Returns:
             None
         """
-        self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=pickle.dumps(obj))
+        self._upload_bytes(key, pickle.dumps(obj))
 
     def upload_json_to_s3(self, key: str, obj: Dict) -> None:
         """
@@ -352,7 +425,7 @@ class S3Utils:
         Returns:
             None
         """
-        self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=json.dumps(obj))
+        self._upload_bytes(key, json.dumps(obj).encode("utf-8"))
 
     def delete_specific_file(self, file_key: str):
         """
@@ -366,6 +439,58 @@ class S3Utils:
         """
         self.s3.delete_object(Bucket=self.bucket_name, Key=file_key)
 
+    async def _get_async_client(self):
+        """
+        Return the shared aiobotocore S3 client, creating it on first use.
+
+        The client is bound to the event loop it was created on, so a call from a
+        different loop (e.g. a second `asyncio.run`) gets a fresh client. Call `close`,
+        or use the instance as an async context manager, to release it.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # The previous client's connections died with its loop; just drop it
+            self._async_loop = loop
+            self._async_client = None
+            self._async_stack = None
+            self._async_client_lock = asyncio.Lock()
+
+        if self._async_client is None:
+            async with self._async_client_lock:
+                if self._async_client is None:
+                    stack = AsyncExitStack()
+                    session = get_session()
+                    self._async_client = await stack.enter_async_context(
+                        session.create_client(
+                            "s3",
+                            region_name=os.getenv("AWS_REGION"),
+                            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                        )
+                    )
+                    self._async_stack = stack
+        return self._async_client
+
+    async def close(self) -> None:
+        """
+        Close the shared aiobotocore client, if one was opened.
+
+        Returns:
+            None
+        """
+        if self._async_stack is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_stack.aclose()
+        self._async_client = None
+        self._async_stack = None
+        self._async_loop = None
+        self._async_client_lock = None
+
+    async def __aenter__(self) -> "S3Utils":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
     async def upload_file_async(self, img_local_lctn: str, s3_key: str) -> None:
         """
         Upload a file asynchronously to the S3 bucket.
@@ -378,15 +503,9 @@ class S3Utils:
         Returns:
             None
         """
-        session = get_session()
-        async with session.create_client(
-            "s3",
-            region_name=os.getenv("AWS_REGION"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        ) as s3:
-            with open(img_local_lctn, "rb") as file:
-                await s3.put_object(Bucket=self.bucket_name, Key=s3_key, Body=file)
+        s3 = await self._get_async_client()
+        with open(img_local_lctn, "rb") as file:
+            await s3.put_object(Bucket=self.bucket_name, Key=s3_key, Body=file)
 
     @staticmethod
     async def upload_string_to_s3_async(s3_bucket: str, s3_key: str, file: str) -> None:
@@ -401,6 +520,7 @@ class S3Utils:
         Returns:
             None
         """
+        # Static (no instance), so it cannot use the shared client
         session = get_session()
         async with session.create_client(
             "s3",
@@ -421,14 +541,8 @@ class S3Utils:
         Returns:
             None
         """
-        session = get_session()
-        async with session.create_client(
-            "s3",
-            region_name=os.getenv("AWS_REGION"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        ) as s3:
-            await s3.put_object(Bucket=self.bucket_name, Key=key, Body=fileobj)
+        s3 = await self._get_async_client()
+        await s3.put_object(Bucket=self.bucket_name, Key=key, Body=fileobj)
 
     async def upload_json_to_s3_async(self, document: Dict, s3_key: str) -> None:
         """
@@ -441,15 +555,9 @@ class S3Utils:
         Returns:
             None
         """
-        session = get_session()
-        async with session.create_client(
-            "s3",
-            region_name=os.getenv("AWS_REGION"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        ) as s3:
-            json_data = json.dumps(document)
-            await s3.put_object(Bucket=self.bucket_name, Key=s3_key, Body=json_data)
+        s3 = await self._get_async_client()
+        json_data = json.dumps(document)
+        await s3.put_object(Bucket=self.bucket_name, Key=s3_key, Body=json_data)
 
     @staticmethod
     def parse_s3_key(s3_path: str) -> str: